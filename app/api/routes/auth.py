@@ -1,4 +1,6 @@
 # app/api/routes/auth.py
+import json
+import jwt
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Request
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta, timezone
@@ -9,8 +11,8 @@ from app.core.security import (
     verify_password, generate_refresh_token, hash_token,
     create_access_token, create_id_token)
 from app.core.config import settings
+from app.core.oauth import get_provider, request_jwks_refresh
 from app.utils.emailer import send_email
-from botocore.exceptions import ClientError
 
 router = APIRouter()
 
@@ -42,17 +44,7 @@ async def request_email_verification(payload: EmailRequest, background: Backgrou
 
         print(f"[DEBUG] OTP for {payload.email} is {otp}")
 
-        try:
-
-            send_email(to_address=payload.email, subject="EMAIL Verification OTP", body=f"For TALKIE : Your email verification code is {otp}")
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            error_message = e.response["Error"]["Message"]
-
-            if error_code == "MessageRejected":
-                print("❌ Email rejected:", error_message)
-            else:
-                print("❌ Unexpected error:", error_message)
+        send_email(to_address=payload.email, subject="EMAIL Verification OTP", body=f"For TALKIE : Your email verification code is {otp}")
 
 
         return {"message": "OTP sent successfully"}
@@ -174,38 +166,108 @@ async def login(payload: LoginRequest, request: Request, db = Depends(get_db)):
             # consider logging failed attempts separately
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-        # 3) create ID and access tokens (JWT)
-        access_token = create_access_token(str(user_id))
-        id_token = create_id_token(str(user_id), str(payload.email), full_name)
-
-        # 4) create refresh token (unhashed for client), store hashed in DB
-        refresh_token_plain = generate_refresh_token()
-        refresh_token_hash = hash_token(refresh_token_plain)
-
-        refresh_id = str(uuid4())
-        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        user_agent = request.headers.get("user-agent")
-        ip_addr = request.client.host if request.client else None
-
-        insert_q = """
-        INSERT INTO refresh_tokens (id, user_id, token_hash, user_agent, ip_addr, expires_at, revoked, created_at, replaced_by)
-        VALUES (%s, %s, %s, %s, %s, %s, false, NOW(), NULL)
-        """
-        await cursor.execute(insert_q, (refresh_id, user_id, refresh_token_hash, user_agent, ip_addr, expires_at))
-        # commit is handled by your get_db context manager's commit/rollback logic.
-        # If your get_db requires explicit commit use: await db.connection.commit()
-        try:
-            # If your contextmanager yields cursor, you might need to explicitly commit:
-            await cursor.connection.commit()
-        except Exception:
-            await cursor.connection.rollback()
-            raise
-
-        response = {
-            "access_token": access_token,
-            "id_token": id_token,
-            "refresh_token": refresh_token_plain,
-            "token_type": "bearer",
-            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        }
-        return response
\ No newline at end of file
+        return await issue_tokens(cursor, request, user_id, str(payload.email), full_name)
+
+
+async def issue_tokens(cursor, request: Request, user_id, email: str, full_name: str | None) -> dict:
+    # 3) create ID and access tokens (JWT)
+    access_token = create_access_token(str(user_id))
+    id_token = create_id_token(str(user_id), email, full_name)
+
+    # 4) create refresh token (unhashed for client), store hashed in DB
+    refresh_token_plain = generate_refresh_token()
+    refresh_token_hash = hash_token(refresh_token_plain)
+
+    refresh_id = str(uuid4())
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    user_agent = request.headers.get("user-agent")
+    ip_addr = request.client.host if request.client else None
+
+    insert_q = """
+    INSERT INTO refresh_tokens (id, user_id, token_hash, user_agent, ip_addr, expires_at, revoked, created_at, replaced_by)
+    VALUES (%s, %s, %s, %s, %s, %s, false, NOW(), NULL)
+    """
+    await cursor.execute(insert_q, (refresh_id, user_id, refresh_token_hash, user_agent, ip_addr, expires_at))
+    # commit is handled by your get_db context manager's commit/rollback logic.
+    # If your get_db requires explicit commit use: await db.connection.commit()
+    try:
+        # If your contextmanager yields cursor, you might need to explicitly commit:
+        await cursor.connection.commit()
+    except Exception:
+        await cursor.connection.rollback()
+        raise
+
+    response = {
+        "access_token": access_token,
+        "id_token": id_token,
+        "refresh_token": refresh_token_plain,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    }
+    return response
+
+
+class OAuthLoginRequest(BaseModel):
+    id_token: str
+
+
+# Resolve the user for a provider identity in one round trip: reuse the linked
+# account if there is one, otherwise upsert the user by (provider verified) email,
+# and link the oauth account to whichever user was found
+OAUTH_UPSERT_Q = """
+WITH linked AS (
+    SELECT u.id, u.email, u.full_name
+    FROM oauth_accounts oa JOIN users u ON u.id = oa.user_id
+    WHERE oa.provider = %(provider)s AND oa.provider_user_id = %(sub)s
+), upserted AS (
+    INSERT INTO users (email, email_verified, full_name, created_at, updated_at)
+    SELECT %(email)s, true, %(name)s, NOW(), NOW()
+    WHERE NOT EXISTS (SELECT 1 FROM linked)
+    ON CONFLICT (email) DO UPDATE
+        SET email_verified = true,
+            full_name = COALESCE(users.full_name, EXCLUDED.full_name),
+            updated_at = NOW()
+    RETURNING id, email, full_name
+), account_user AS (
+    SELECT * FROM linked UNION ALL SELECT * FROM upserted
+), account AS (
+    INSERT INTO oauth_accounts (user_id, provider, provider_user_id, provider_email, extra, created_at)
+    SELECT id, %(provider)s, %(sub)s, %(email)s, %(extra)s::jsonb, NOW() FROM account_user
+    ON CONFLICT (provider, provider_user_id) DO UPDATE
+        SET provider_email = EXCLUDED.provider_email, extra = EXCLUDED.extra
+)
+SELECT id, email, full_name FROM account_user
+"""
+
+@router.post("/oauth/{provider_name}/login", response_model=LoginResponse)
+async def oauth_login(provider_name: str, payload: OAuthLoginRequest, request: Request, db = Depends(get_db)):
+    provider = get_provider(provider_name)
+    if provider is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown OAuth provider")
+    if not provider.keys:
+        request_jwks_refresh()
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Provider signing keys not loaded yet")
+
+    # 1) verify the provider ID token against the cached JWKS (no network call)
+    try:
+        claims = provider.verify(payload.id_token)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid ID token")
+
+    # Only link accounts by email the provider has verified, otherwise anyone could claim an address
+    if not claims.get("email") or claims.get("email_verified") is not True:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Provider email not verified")
+
+    async with db as cursor:
+        # 2) upsert users / oauth_accounts in one statement
+        await cursor.execute(OAUTH_UPSERT_Q, {
+            "provider": provider.name,
+            "sub": claims["sub"],
+            "email": claims["email"],
+            "name": claims.get("name"),
+            "extra": json.dumps({"iss": claims["iss"], "picture": claims.get("picture")}),
+        })
+        row = await cursor.fetchone()
+
+        # 3) issue our own access / id / refresh tokens
+        return await issue_tokens(cursor, request, row["id"], row["email"], row["full_name"])
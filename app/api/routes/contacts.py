@@ -1,6 +1,5 @@
-from datetime import datetime
 from fastapi import APIRouter, Request, HTTPException, Depends, status
-from app.db.mongo import get_mongo_db
+from app.db.mongo import get_mongo_db, utcnow
 from app.db.session import get_db
 
 contacts_router = APIRouter()
@@ -34,7 +33,7 @@ async def add_contact(request: Request, contact_email:str, db=Depends(get_mongo_
                                                 "user_id": user_id,
                                                 "contact_email": contact_email,
                                                 "contact_name": row["full_name"],
-                                                "created_at": datetime.now()})
+                                                "created_at": utcnow()})
 
     return {"new_contact_id": str(new_contact.inserted_id),
             "new_contact_name": row["full_name"]}
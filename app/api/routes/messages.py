@@ -1,20 +1,68 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
-from app.db.mongo import get_mongo_db
+from datetime import datetime, timezone
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from app.db.mongo import get_mongo_db, utcnow
+from app.db.conversations import list_conversations, mark_conversation_read
+from app.db.archive import find_archived_messages
 
 message_route = APIRouter()
 
 @message_route.get("/get_messages/{contact_user_id}")
-async def get_messages(request: Request, contact_user_id: str, db=Depends(get_mongo_db)):
+async def get_messages(request: Request, contact_user_id: str,
+                       limit: int = Query(50, ge=1, le=200),
+                       before: datetime | None = None,
+                       db=Depends(get_mongo_db)):
     user_data = request.state.user
 
     user_id = user_data["sub"]
 
-    messages = await db.messages.find({"$or":
-                                           [
-                                               {"sender_id": user_id,
-                                                "receiver_id": contact_user_id},
-                                               {"receiver_id": user_id,
-                                                "sender_id": contact_user_id}
-                                           ]}, {"_id": 0}).to_list()
+    # Stored timestamps are naive UTC, so compare against a naive UTC `before`
+    if before is not None and before.tzinfo is not None:
+        before = before.astimezone(timezone.utc).replace(tzinfo=None)
 
+    query = {"$or":
+                 [
+                     {"sender_id": user_id,
+                      "receiver_id": contact_user_id},
+                     {"receiver_id": user_id,
+                      "sender_id": contact_user_id}
+                 ]}
+    if before is not None:
+        query["timestamp"] = {"$lt": before}
+
+    messages = await db.messages.find(query, {"_id": 0, "expires_at": 0}).sort("timestamp", -1).to_list(length=limit)
+
+    # Scrolled past the hot collection, continue from the archive
+    if len(messages) < limit:
+        oldest = messages[-1]["timestamp"] if messages else before or utcnow()
+        messages += await find_archived_messages(db, user_id, contact_user_id, oldest, limit - len(messages))
+
+    # Oldest first; pass the first message's timestamp as `before` to load older ones
+    messages.reverse()
     return messages
+
+
+@message_route.get("/conversations")
+async def get_conversations(request: Request,
+                            limit: int = Query(20, ge=1, le=100),
+                            before: datetime | None = None,
+                            before_contact_user_id: str | None = None,
+                            db=Depends(get_mongo_db)):
+    user_id = request.state.user["sub"]
+
+    conversations = await list_conversations(db, user_id, limit, before, before_contact_user_id)
+
+    # Clients pass next_before / next_before_contact_user_id back to fetch the next page
+    last = conversations[-1] if len(conversations) == limit else None
+
+    return {"conversations": conversations,
+            "next_before": last["last_message_at"] if last else None,
+            "next_before_contact_user_id": last["contact_user_id"] if last else None}
+
+
+@message_route.post("/mark_read/{contact_user_id}")
+async def mark_read(request: Request, contact_user_id: str, db=Depends(get_mongo_db)):
+    user_id = request.state.user["sub"]
+
+    await mark_conversation_read(db, user_id, contact_user_id)
+
+    return {"message": "Conversation marked as read"}
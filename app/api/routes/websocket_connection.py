@@ -1,31 +1,108 @@
-from bson import ObjectId
-from fastapi import WebSocket, APIRouter, Request, Depends
-from datetime import datetime
-from app.db.mongo import get_mongo_db
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from fastapi import WebSocket, WebSocketDisconnect, APIRouter, Request, Depends
+from datetime import timedelta
+from app.db.mongo import get_mongo_db, utcnow
+from app.db.conversations import record_message
 from app.core.config import settings
+from app.utils.ephemeral import EphemeralCoalescer, EPHEMERAL_EVENT_TYPES
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 
+WS_CLOSE_SERVICE_RESTART = 1012
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, max_connections: int | None = None):
         self.active_connections = {}  # user_id -> websocket
+        self._max_connections = max_connections
+        self.reset()
+
+    def reset(self):
+        """Accept sockets again; called on lifespan startup so a restart in the same process isn't stuck draining."""
+        self.draining = False
+        self._in_flight = 0
+        # Recreated here so it binds to the current event loop
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def max_connections(self) -> int:
+        return self._max_connections or settings.WS_MAX_CONNECTIONS_PER_WORKER
+
+    def can_accept(self) -> bool:
+        return not self.draining and len(self.active_connections) < self.max_connections
 
     async def connect(self, user_id: str, websocket: WebSocket):
         await websocket.accept()
         self.active_connections[user_id] = websocket
 
-    def disconnect(self, user_id: str):
-        self.active_connections.pop(user_id, None)
+    def disconnect(self, user_id: str, websocket: WebSocket | None = None):
+        # Only drop the entry if it still belongs to this socket, a reconnect may have replaced it
+        if websocket is None or self.active_connections.get(user_id) is websocket:
+            self.active_connections.pop(user_id, None)
 
     async def send_personal_message(self, user_id: str, message: dict):
         if user_id in self.active_connections:
             print("user id in connection---going to send:", message["sender_id"], message["receiver_id"] )
-            await self.active_connections[user_id].send_json(message["message"])
+            await self.active_connections[user_id].send_json({
+                "type": "message",
+                "sender_id": message["sender_id"],
+                "message": message["message"],
+            })
             print("message sent successfully")
 
+    async def send_event(self, user_id: str, event: dict):
+        if user_id in self.active_connections:
+            await self.active_connections[user_id].send_json(event)
+
+    @asynccontextmanager
+    async def track_write(self):
+        """Mark a message write as in flight so drain() can wait for it to finish."""
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+    async def drain(self):
+        """Stop accepting sockets, flush pending writes and close clients in staggered batches."""
+        self.draining = True
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=settings.WS_DRAIN_FLUSH_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Drain flush timed out with {self._in_flight} writes pending")
+
+        connections = list(self.active_connections.items())
+        batch_size = settings.WS_DRAIN_BATCH_SIZE
+        print(f"🔻 Draining {len(connections)} WebSocket connections")
+
+        for start in range(0, len(connections), batch_size):
+            batch = connections[start:start + batch_size]
+            await asyncio.gather(*(self._close_for_reconnect(user_id, ws) for user_id, ws in batch))
+            if start + batch_size < len(connections):
+                await asyncio.sleep(settings.WS_DRAIN_BATCH_INTERVAL_SECONDS)
+
+    async def _close_for_reconnect(self, user_id: str, websocket: WebSocket):
+        # Each client waits a random delay before reconnecting so the fleet doesn't reconnect at once
+        delay_ms = random.randint(0, settings.WS_RECONNECT_JITTER_SECONDS * 1000)
+        try:
+            await websocket.send_json({"type": "reconnect", "delay_ms": delay_ms})
+            await websocket.close(code=WS_CLOSE_SERVICE_RESTART)
+        except Exception as e:
+            print("Error closing socket for", user_id, ":", str(e))
+        finally:
+            self.disconnect(user_id, websocket)
+
 
 websocket_route = APIRouter()
 manager = ConnectionManager()
+ephemeral = EphemeralCoalescer(manager.send_event)
 
 @websocket_route.websocket("/connect")
 async def websocket_endpoint(websocket: WebSocket, db=Depends(get_mongo_db)):
@@ -67,6 +144,12 @@ async def websocket_endpoint(websocket: WebSocket, db=Depends(get_mongo_db)):
         await websocket.close(code=1008)
         return
 
+    # Refuse new sockets while draining or at the per-worker cap so the load balancer retries elsewhere
+    if not manager.can_accept():
+        print("Worker draining or full → closing")
+        await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+        return
+
     # 3. Accept connection AFTER auth
     await manager.connect(user_id, websocket)
 
@@ -74,23 +157,58 @@ async def websocket_endpoint(websocket: WebSocket, db=Depends(get_mongo_db)):
         while True:
             data = await websocket.receive_json()
 
+            # Envelope: {"type": ..., "receiver_id": ..., "message" | "data": ...}, untyped frames are chat messages
+            event_type = data.get("type", "message")
             receiver_id = data["receiver_id"]
-            message = data["message"]
 
-            # 1. Save to MongoDB
-            msg_doc = {
-                "sender_id": user_id,
-                "receiver_id": receiver_id,
-                "message": message,
-                "timestamp": datetime.now(),
-                "status": "sent"
-            }
+            if event_type in EPHEMERAL_EVENT_TYPES:
+                # Never persisted, relayed once per coalescing window
+                ephemeral.submit(user_id, receiver_id, {"type": event_type, "sender_id": user_id, "data": data.get("data")})
+                continue
 
-            print(".......messge doc", msg_doc)
-            await db.messages.insert_one(msg_doc)
+            if event_type != "message":
+                await websocket.send_json({"type": "error", "detail": f"Unknown event type: {event_type}"})
+                continue
 
-            # 2. Send to receiver if online
-            await manager.send_personal_message(receiver_id, msg_doc)
+            message = data["message"]
 
-    except:
-        manager.disconnect(user_id)
\ No newline at end of file
+            ttl_seconds = data.get("ttl_seconds")
+            if ttl_seconds is not None and (type(ttl_seconds) is not int or ttl_seconds <= 0):
+                await websocket.send_json({"type": "error", "detail": "ttl_seconds must be a positive integer"})
+                continue
+
+            async with manager.track_write():
+                # 1. Save to MongoDB
+                msg_doc = {
+                    "sender_id": user_id,
+                    "receiver_id": receiver_id,
+                    "message": message,
+                    "timestamp": utcnow(),
+                    "status": "sent"
+                }
+
+                # Ephemeral messages expire through the TTL index on expires_at (UTC like timestamp)
+                if ttl_seconds is not None:
+                    msg_doc["expires_at"] = msg_doc["timestamp"] + timedelta(seconds=ttl_seconds)
+
+                print(".......messge doc", msg_doc)
+                await db.messages.insert_one(msg_doc)
+                await record_message(db, msg_doc)
+
+                # 2. Send to receiver if online
+                await manager.send_personal_message(receiver_id, msg_doc)
+
+    except WebSocketDisconnect:
+        print("WebSocket disconnected:", user_id)
+
+    except Exception as e:
+        print("WebSocket error for", user_id, ":", repr(e))
+        if not manager.draining:
+            try:
+                await websocket.close(code=1011)
+            except RuntimeError:
+                pass  # socket already closed
+
+    finally:
+        manager.disconnect(user_id, websocket)
+        ephemeral.forget(user_id)
@@ -1,14 +1,16 @@
 # app/core/config.py
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
-load_dotenv()
-
 class Settings(BaseSettings):
     DATABASE_URL: str
     SQL_DB_NAME: str
     SQL_DB_USER: str
     SQL_DB_PASSWORD: str
+    SQL_POOL_MIN_SIZE: int = 2
+    SQL_POOL_MAX_SIZE: int = 20
+    SQL_POOL_TIMEOUT_SECONDS: float = 10.0
 
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
@@ -21,10 +23,45 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY: str
     AWS_SECRET_KEY: str
 
+    OAUTH_GOOGLE_CLIENT_ID: str | None = None
+    OAUTH_JWKS_REFRESH_SECONDS: int = 60 * 60  # 1 hour
+    OAUTH_JWKS_MIN_REFRESH_INTERVAL_SECONDS: int = 60
+    OAUTH_JWKS_RETRY_MIN_SECONDS: float = 1.0  # backoff after a failed fetch, doubling up to the max
+    OAUTH_JWKS_RETRY_MAX_SECONDS: float = 60.0
+    OAUTH_CLOCK_SKEW_SECONDS: int = 60  # leeway on exp/iat/nbf for provider clock drift
+
     MONGO_URI: str
     MONGO_DB_NAME: str
 
+    WS_MAX_CONNECTIONS_PER_WORKER: int = 5000
+    WS_DRAIN_BATCH_SIZE: int = 200
+    WS_DRAIN_BATCH_INTERVAL_SECONDS: float = 0.5
+    WS_DRAIN_FLUSH_TIMEOUT_SECONDS: float = 5.0
+    WS_RECONNECT_JITTER_SECONDS: int = 30
+
+    EPHEMERAL_COALESCE_WINDOW_SECONDS: float = 0.3
+    EPHEMERAL_MAX_EVENTS_PER_SECOND: int = 10
+
+    MESSAGE_RETENTION_DAYS: int = 90
+    MESSAGE_ARCHIVE_BATCH_SIZE: int = 500
+    MESSAGE_ARCHIVE_INTERVAL_SECONDS: int = 60 * 60  # 1 hour
+    MESSAGE_ARCHIVE_LEASE_SECONDS: int = 10 * 60  # renewed before every batch
+
     # class Config:
     #     env_file = ".env"
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    # Read .env and validate on first access rather than on import
+    load_dotenv()
+    return Settings()
+
+
+class LazySettings:
+    """Module-level `settings` that defers get_settings() until an attribute is read."""
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = LazySettings()
@@ -0,0 +1,129 @@
+# app/core/oauth.py
+import asyncio
+import time
+import jwt
+from app.core.config import settings
+
+# ID tokens are verified against JWKS cached in memory per provider. The cache is
+# refreshed by a background task started from the lifespan, so a login never
+# waits on the provider's JWKS endpoint.
+
+ALLOWED_ALGORITHMS = ("RS256", "ES256")
+
+
+class OAuthProvider:
+    def __init__(self, name: str, issuers: list[str], jwks_uri: str | None, client_id: str):
+        self.name = name
+        self.issuers = issuers
+        self.jwks_uri = jwks_uri
+        self.client_id = client_id
+        self.keys = {}  # kid -> jwt.PyJWK
+        self.refreshed_at = 0.0
+
+    def load_jwks(self, jwks: dict):
+        self.keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(jwks).keys}
+        self.refreshed_at = time.monotonic()
+
+    async def refresh_keys(self, client):
+        response = await client.get(self.jwks_uri, timeout=10)
+        response.raise_for_status()
+        self.load_jwks(response.json())
+
+    def verify(self, token: str) -> dict:
+        """Return the verified claims of an ID token, raises jwt.PyJWTError otherwise."""
+        header = jwt.get_unverified_header(token)
+
+        key = self.keys.get(header.get("kid"))
+        if key is None:
+            # The provider may have rotated keys; let the refresher pick them up
+            request_jwks_refresh()
+            raise jwt.InvalidKeyError("Unknown signing key")
+
+        # The key decides the algorithm; a header naming another one is rejected, not trusted
+        if key.algorithm_name not in ALLOWED_ALGORITHMS or header.get("alg") != key.algorithm_name:
+            raise jwt.InvalidAlgorithmError("Signing algorithm does not match the key")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[key.algorithm_name],
+            audience=self.client_id,
+            leeway=settings.OAUTH_CLOCK_SKEW_SECONDS,
+            options={"require": ["exp", "iat", "iss", "sub", "aud"]},
+        )
+        if claims["iss"] not in self.issuers:
+            raise jwt.InvalidIssuerError("Invalid issuer")
+        return claims
+
+
+providers = {}  # name -> OAuthProvider
+
+# Created by run_jwks_refresher, so it always belongs to the loop the refresher runs on
+_refresh_requested: asyncio.Event | None = None
+
+
+def request_jwks_refresh():
+    """Wake the refresher early, e.g. on an unknown kid or a provider with no keys yet."""
+    if _refresh_requested is not None:
+        _refresh_requested.set()
+
+
+def register_provider(provider: OAuthProvider):
+    providers[provider.name] = provider
+
+
+def register_configured_providers():
+    if settings.OAUTH_GOOGLE_CLIENT_ID:
+        register_provider(OAuthProvider(
+            "google",
+            issuers=["https://accounts.google.com", "accounts.google.com"],
+            jwks_uri="https://www.googleapis.com/oauth2/v3/certs",
+            client_id=settings.OAUTH_GOOGLE_CLIENT_ID,
+        ))
+
+
+def get_provider(name: str) -> OAuthProvider | None:
+    return providers.get(name)
+
+
+async def refresh_all_jwks() -> bool:
+    """Refresh every remote provider's keys, returns False if any of them has none to use."""
+    import httpx
+
+    healthy = True
+    async with httpx.AsyncClient() as client:
+        for provider in list(providers.values()):
+            if provider.jwks_uri is None:
+                continue  # keys loaded locally, e.g. the fake IdP in tests
+            try:
+                await provider.refresh_keys(client)
+            except Exception as e:
+                print(f"❌ JWKS refresh failed for {provider.name}:", repr(e))
+                healthy = False
+            if not provider.keys:
+                healthy = False
+    return healthy
+
+
+async def run_jwks_refresher():
+    """Background loop started from the app lifespan."""
+    global _refresh_requested
+    _refresh_requested = asyncio.Event()
+    retry_in = settings.OAUTH_JWKS_RETRY_MIN_SECONDS
+
+    while True:
+        _refresh_requested.clear()
+
+        if not await refresh_all_jwks():
+            # A failed fetch (e.g. a network blip at pod start) is retried soon, not in an hour
+            await asyncio.sleep(retry_in)
+            retry_in = min(retry_in * 2, settings.OAUTH_JWKS_RETRY_MAX_SECONDS)
+            continue
+        retry_in = settings.OAUTH_JWKS_RETRY_MIN_SECONDS
+
+        try:
+            await asyncio.wait_for(_refresh_requested.wait(), timeout=settings.OAUTH_JWKS_REFRESH_SECONDS)
+            # Unknown kid seen; wait a little so a flood of bad tokens can't hammer the provider
+            await asyncio.sleep(settings.OAUTH_JWKS_MIN_REFRESH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
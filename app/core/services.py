@@ -0,0 +1,51 @@
+# app/core/services.py
+import inspect
+from contextlib import contextmanager
+
+# External clients (Mongo, Postgres pool, SES) are registered here as factories
+# and only built on first use, so importing the app never pays for them.
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._factories = {}  # name -> (factory, close)
+        self._instances = {}  # name -> built instance
+        self._overrides = {}  # name -> instance used instead of the factory (tests)
+
+    def register(self, name: str, factory, close=None):
+        self._factories[name] = (factory, close)
+
+    def get(self, name: str):
+        if name in self._overrides:
+            return self._overrides[name]
+        if name not in self._instances:
+            factory, _ = self._factories[name]
+            self._instances[name] = factory()
+        return self._instances[name]
+
+    @contextmanager
+    def override(self, name: str, instance):
+        """Temporarily replace a service, e.g. `with services.override("ses", FakeSES()):`"""
+        previous = self._overrides.get(name)
+        self._overrides[name] = instance
+        try:
+            yield instance
+        finally:
+            if previous is None:
+                self._overrides.pop(name, None)
+            else:
+                self._overrides[name] = previous
+
+    async def aclose(self):
+        """Close every built service, newest first. Called from the app lifespan."""
+        for name in reversed(list(self._instances)):
+            _, close = self._factories[name]
+            instance = self._instances.pop(name)
+            if close is None:
+                continue
+            result = close(instance)
+            if inspect.isawaitable(result):
+                await result
+
+
+services = ServiceRegistry()
@@ -0,0 +1,190 @@
+# app/db/archive.py
+import asyncio
+import hashlib
+import os
+import socket
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.db.mongo import utcnow
+
+# Index/sort directions; plain ints so importing this module doesn't load pymongo
+ASC, DESC = 1, -1
+
+# Messages older than MESSAGE_RETENTION_DAYS are moved out of `messages` into
+# `message_archive` buckets: one document per conversation per batch, holding the
+# messages with short field names, BSON encoded and zlib compressed. Each bucket
+# also lists the archived message _ids (`ids`), so a message is only deleted from
+# `messages` once it is confirmed to be in the archive.
+
+ARCHIVER_LEASE_ID = "message_archiver"
+
+# long field name -> archived short field name
+ARCHIVE_FIELDS = {
+    "sender_id": "f",
+    "receiver_id": "t",
+    "message": "m",
+    "timestamp": "ts",
+    "status": "st",
+    "read_at": "r",
+}
+
+
+def conversation_key(user_a: str, user_b: str) -> str:
+    return ":".join(sorted((user_a, user_b)))
+
+
+async def ensure_archive_indexes(db):
+    await db.messages.create_index(
+        [("sender_id", ASC), ("receiver_id", ASC), ("timestamp", DESC)]
+    )
+    await db.messages.create_index([("timestamp", ASC)])
+    await db.message_archive.create_index([("c", ASC), ("e", DESC)])
+    await db.message_archive.create_index("ids")
+
+    # Ephemeral messages carry an expires_at and are removed by Mongo itself
+    await db.messages.create_index("expires_at", expireAfterSeconds=0)
+
+
+def compress_messages(messages: list[dict]) -> bytes:
+    import bson
+
+    compact = [{short: msg[long] for long, short in ARCHIVE_FIELDS.items() if long in msg}
+               for msg in messages]
+    return zlib.compress(bson.encode({"msgs": compact}))
+
+
+def decompress_messages(blob: bytes) -> list[dict]:
+    import bson
+
+    compact = bson.decode(zlib.decompress(blob))["msgs"]
+    return [{long: msg[short] for long, short in ARCHIVE_FIELDS.items() if short in msg}
+            for msg in compact]
+
+
+def bucket_id(msgs: list[dict]) -> str:
+    # Derived from the exact set of messages, so a bucket is never mistaken for another batch's
+    digest = hashlib.sha1()
+    for msg_id in sorted(msg["_id"].binary for msg in msgs):
+        digest.update(msg_id)
+    return digest.hexdigest()
+
+
+async def archived_ids(db, ids: list) -> set:
+    found = set()
+    async for bucket in db.message_archive.find({"ids": {"$in": ids}}, {"ids": 1}):
+        found.update(bucket["ids"])
+    return found & set(ids)
+
+
+async def archive_batch(db, cutoff: datetime, batch_size: int) -> int:
+    """Move one batch of messages older than cutoff into the archive, returns how many moved."""
+    from pymongo import UpdateOne
+
+    batch = await (
+        db.messages.find({"timestamp": {"$lt": cutoff}, "expires_at": {"$exists": False}})
+        .sort("timestamp", ASC)
+        .limit(batch_size)
+        .to_list(length=batch_size)
+    )
+    if not batch:
+        return 0
+
+    # Messages archived by an earlier run that died before deleting them
+    already = await archived_ids(db, [msg["_id"] for msg in batch])
+
+    buckets = {}
+    for msg in batch:
+        if msg["_id"] not in already:
+            buckets.setdefault(conversation_key(msg["sender_id"], msg["receiver_id"]), []).append(msg)
+
+    if buckets:
+        await db.message_archive.bulk_write([
+            UpdateOne(
+                {"_id": bucket_id(msgs)},
+                {"$setOnInsert": {
+                    "c": key,
+                    "s": msgs[0]["timestamp"],
+                    "e": msgs[-1]["timestamp"],
+                    "n": len(msgs),
+                    "ids": [msg["_id"] for msg in msgs],
+                    "z": compress_messages(msgs),
+                }},
+                upsert=True,
+            )
+            for key, msgs in buckets.items()
+        ], ordered=False)
+
+    # Only delete what the archive actually holds
+    confirmed = await archived_ids(db, [msg["_id"] for msg in batch])
+    await db.messages.delete_many({"_id": {"$in": list(confirmed)}})
+    return len(confirmed)
+
+
+async def acquire_lease(db, owner: str, seconds: int) -> bool:
+    """Take or renew the archiver lease, so only one worker archives at a time."""
+    from pymongo.errors import DuplicateKeyError
+
+    now = datetime.now(timezone.utc)
+    try:
+        await db.job_leases.find_one_and_update(
+            {"_id": ARCHIVER_LEASE_ID, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # Lease exists and another live worker holds it
+        return False
+    return True
+
+
+async def release_lease(db, owner: str):
+    await db.job_leases.update_one(
+        {"_id": ARCHIVER_LEASE_ID, "owner": owner},
+        {"$set": {"expires_at": datetime.now(timezone.utc)}},
+    )
+
+
+async def archive_old_messages(db, owner: str) -> int:
+    cutoff = utcnow() - timedelta(days=settings.MESSAGE_RETENTION_DAYS)
+    total = 0
+    while await acquire_lease(db, owner, settings.MESSAGE_ARCHIVE_LEASE_SECONDS):
+        moved = await archive_batch(db, cutoff, settings.MESSAGE_ARCHIVE_BATCH_SIZE)
+        total += moved
+        if moved < settings.MESSAGE_ARCHIVE_BATCH_SIZE:
+            break
+        # Yield between batches so the job doesn't starve request handling
+        await asyncio.sleep(0)
+    return total
+
+
+async def run_archiver(db):
+    """Background loop started from the app lifespan."""
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    while True:
+        try:
+            moved = await archive_old_messages(db, owner)
+            if moved:
+                print(f"🗄️ Archived {moved} messages")
+            await release_lease(db, owner)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("❌ Message archival failed:", repr(e))
+        await asyncio.sleep(settings.MESSAGE_ARCHIVE_INTERVAL_SECONDS)
+
+
+async def find_archived_messages(db, user_a: str, user_b: str, before: datetime, limit: int) -> list[dict]:
+    """Newest-first archived messages of a conversation older than `before`."""
+    key = conversation_key(user_a, user_b)
+    found = []
+
+    async for bucket in db.message_archive.find({"c": key, "s": {"$lt": before}}).sort("e", DESC):
+        msgs = [msg for msg in decompress_messages(bucket["z"]) if msg["timestamp"] < before]
+        found.extend(reversed(msgs))
+        if len(found) >= limit:
+            break
+
+    found.sort(key=lambda msg: msg["timestamp"], reverse=True)
+    return found[:limit]
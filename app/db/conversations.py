@@ -0,0 +1,136 @@
+# app/db/conversations.py
+from datetime import datetime
+from app.db.mongo import utcnow
+
+# Index/sort directions; plain ints so importing this module doesn't load pymongo
+ASC, DESC = 1, -1
+
+# One summary document per (user_id, contact_user_id) pair, so each participant
+# has their own last-message snapshot and unread counter for the inbox.
+
+
+async def ensure_conversation_indexes(db):
+    await db.conversations.create_index(
+        [("user_id", ASC), ("contact_user_id", ASC)], unique=True
+    )
+    # Inbox paging sorts on (last_message_at, contact_user_id) so page boundaries are exact
+    await db.conversations.create_index(
+        [("user_id", ASC), ("last_message_at", DESC), ("contact_user_id", DESC)]
+    )
+    # Read receipts only touch the still-unread messages of a pair
+    await db.messages.create_index(
+        [("receiver_id", ASC), ("sender_id", ASC), ("status", ASC)]
+    )
+
+
+async def record_message(db, msg_doc: dict):
+    """Update both participants' conversation summaries for a new message."""
+    from pymongo import UpdateOne
+
+    sender_id = msg_doc["sender_id"]
+    receiver_id = msg_doc["receiver_id"]
+    last = {
+        "last_message": msg_doc["message"],
+        "last_message_at": msg_doc["timestamp"],
+        "last_sender_id": sender_id,
+    }
+
+    await db.conversations.bulk_write([
+        UpdateOne(
+            {"user_id": sender_id, "contact_user_id": receiver_id},
+            {"$set": last, "$setOnInsert": {"unread_count": 0}},
+            upsert=True,
+        ),
+        UpdateOne(
+            {"user_id": receiver_id, "contact_user_id": sender_id},
+            {"$set": last, "$inc": {"unread_count": 1}},
+            upsert=True,
+        ),
+    ], ordered=False)
+
+
+async def mark_conversation_read(db, user_id: str, contact_user_id: str):
+    """Reset the reader's unread counter and flag the delivered messages as read."""
+    await db.messages.update_many(
+        {"receiver_id": user_id, "sender_id": contact_user_id, "status": {"$in": ["sent"]}},
+        {"$set": {"status": "read", "read_at": utcnow()}},
+    )
+    await db.conversations.update_one(
+        {"user_id": user_id, "contact_user_id": contact_user_id},
+        {"$set": {"unread_count": 0}},
+    )
+
+
+async def list_conversations(db, user_id: str, limit: int, before: datetime | None = None,
+                             before_contact_user_id: str | None = None):
+    """Newest-first inbox page, continuing after the (before, before_contact_user_id) cursor."""
+    query = {"user_id": user_id}
+    if before is not None:
+        # Several conversations can share a millisecond; the contact id breaks the tie
+        query["$or"] = [{"last_message_at": {"$lt": before}}]
+        if before_contact_user_id is not None:
+            query["$or"].append({"last_message_at": before, "contact_user_id": {"$lt": before_contact_user_id}})
+
+    cursor = (
+        db.conversations.find(query, {"_id": 0})
+        .sort([("last_message_at", DESC), ("contact_user_id", DESC)])
+        .limit(limit)
+    )
+    return await cursor.to_list(length=limit)
+
+
+async def backfill_conversations(db):
+    """Build summaries for histories that predate the conversations collection.
+
+    For summaries record_message already wrote since deploy, the backfilled
+    unread_count (which counts every unread message) wins, and the newer
+    last message is kept.
+    """
+    await ensure_conversation_indexes(db)
+
+    pipeline = [
+        {"$sort": {"timestamp": ASC}},
+        # Each message counts towards both participants' summaries, unread only for the receiver
+        {"$project": {
+            "message": 1,
+            "timestamp": 1,
+            "sender_id": 1,
+            "sides": [
+                {"user_id": "$sender_id", "contact_user_id": "$receiver_id", "unread": 0},
+                {"user_id": "$receiver_id", "contact_user_id": "$sender_id",
+                 "unread": {"$cond": [{"$eq": ["$status", "read"]}, 0, 1]}},
+            ],
+        }},
+        {"$unwind": "$sides"},
+        {"$group": {
+            "_id": {"user_id": "$sides.user_id", "contact_user_id": "$sides.contact_user_id"},
+            "last_message": {"$last": "$message"},
+            "last_message_at": {"$last": "$timestamp"},
+            "last_sender_id": {"$last": "$sender_id"},
+            "unread_count": {"$sum": "$sides.unread"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "contact_user_id": "$_id.contact_user_id",
+            "last_message": 1,
+            "last_message_at": 1,
+            "last_sender_id": 1,
+            "unread_count": 1,
+        }},
+        {"$merge": {
+            "into": "conversations",
+            "on": ["user_id", "contact_user_id"],
+            "whenMatched": [{"$set": {
+                "unread_count": "$$new.unread_count",
+                "last_message": {"$cond": [{"$gte": ["$last_message_at", "$$new.last_message_at"]},
+                                           "$last_message", "$$new.last_message"]},
+                "last_sender_id": {"$cond": [{"$gte": ["$last_message_at", "$$new.last_message_at"]},
+                                             "$last_sender_id", "$$new.last_sender_id"]},
+                "last_message_at": {"$max": ["$last_message_at", "$$new.last_message_at"]},
+            }}],
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+    await db.messages.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
@@ -1,11 +1,21 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timezone
 from app.core.config import settings
+from app.core.services import services
 
-class MongoDB:
-    client: AsyncIOMotorClient = None
-    db = None
 
-mongo = MongoDB()
+def create_mongo_client():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(settings.MONGO_URI)
+
+
+services.register("mongo", create_mongo_client, close=lambda client: client.close())
+
 
 def get_mongo_db():
-    return mongo.db
\ No newline at end of file
+    return services.get("mongo")[settings.MONGO_DB_NAME]
+
+
+def utcnow() -> datetime:
+    # Mongo treats naive datetimes as UTC (TTL indexes included), so every stored
+    # timestamp is naive UTC whatever the host's local timezone is
+    return datetime.now(timezone.utc).replace(tzinfo=None)
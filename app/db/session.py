@@ -1,24 +1,31 @@
 # app/db/session.py
-import psycopg
-from psycopg.rows import dict_row
 from contextlib import asynccontextmanager
 from app.core.config import settings
+from app.core.services import services
 
-@asynccontextmanager
-async def get_db():
-    conn = await psycopg.AsyncConnection.connect(
-        f"dbname={settings.SQL_DB_NAME} user={settings.SQL_DB_USER} password='{settings.SQL_DB_PASSWORD}' host=localhost port=5432"
+
+def create_pg_pool():
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+    # Opened by the app lifespan; open=False keeps construction free of I/O
+    return AsyncConnectionPool(
+        f"dbname={settings.SQL_DB_NAME} user={settings.SQL_DB_USER} password='{settings.SQL_DB_PASSWORD}' host=localhost port=5432",
+        kwargs={"row_factory": dict_row},
+        min_size=settings.SQL_POOL_MIN_SIZE,
+        max_size=settings.SQL_POOL_MAX_SIZE,
+        timeout=settings.SQL_POOL_TIMEOUT_SECONDS,
+        open=False,
     )
 
-    # Set the row factory for the connection
-    conn.row_factory = dict_row
 
-    try:
+services.register("postgres", create_pg_pool, close=lambda pool: pool.close())
+
+
+@asynccontextmanager
+async def get_db():
+    pool = services.get("postgres")
+
+    # The pool commits on success and rolls back if the block raises
+    async with pool.connection() as conn:
         async with conn.cursor() as cur:
             yield cur
-            await conn.commit()
-    except Exception:
-        await conn.rollback()
-        raise
-    finally:
-        await conn.close()
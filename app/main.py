@@ -1,29 +1,90 @@
 # app/main.py
+import asyncio
+import signal
+import threading
 from fastapi import FastAPI, Depends
 from app.api.routes import auth, contacts
 from app.api.routes.contacts import contacts_router
-from app.api.routes.websocket_connection import websocket_route
+from app.api.routes.websocket_connection import websocket_route, manager
 from app.api.routes.messages import message_route
 from contextlib import asynccontextmanager
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.db.mongo import mongo
-from app.core.config import settings
+from app.core.services import services
+from app.db.mongo import get_mongo_db
+from app.db.conversations import ensure_conversation_indexes
+from app.db.archive import ensure_archive_indexes, run_archiver
+from app.core.oauth import register_configured_providers, run_jwks_refresher
 from app.core.security import verify_and_decode_access_token
 
 
+def install_drain_on_sigterm():
+    """Drain WebSocket workers before handing SIGTERM to the server.
+
+    Uvicorn closes open sockets itself before running lifespan shutdown, so the
+    drain has to start as soon as the signal arrives.
+    """
+    # Signal handlers can only be set from the main thread; TestClient runs the lifespan elsewhere
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def forward(_task):
+        if callable(previous):
+            previous(signal.SIGTERM, None)
+        else:
+            # SIG_DFL / SIG_IGN: put it back and re-deliver so the process still exits
+            signal.signal(signal.SIGTERM, previous)
+            signal.raise_signal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        loop.call_soon_threadsafe(lambda: loop.create_task(manager.drain()).add_done_callback(forward))
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+def report_task_exit(name: str):
+    """Done-callback for background tasks, so one that dies doesn't go unnoticed."""
+    def callback(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Background task {name} died:", repr(task.exception()))
+    return callback
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 🔹 Startup
-    mongo.client = AsyncIOMotorClient(settings.MONGO_URI)
-    mongo.db = mongo.client[settings.MONGO_DB_NAME]
+    manager.reset()
+
+    mongo_db = get_mongo_db()
+    await ensure_conversation_indexes(mongo_db)
+    await ensure_archive_indexes(mongo_db)
 
     print("✅ MongoDB connected")
 
+    await services.get("postgres").open()
+    print("✅ Postgres pool opened")
+
+    archiver = asyncio.create_task(run_archiver(mongo_db))
+    archiver.add_done_callback(report_task_exit("archiver"))
+
+    register_configured_providers()
+    jwks_refresher = asyncio.create_task(run_jwks_refresher())
+    jwks_refresher.add_done_callback(report_task_exit("jwks_refresher"))
+
+    install_drain_on_sigterm()
+
     yield
 
     # 🔹 Shutdown
-    mongo.client.close()
-    print("❌ MongoDB disconnected")
+    archiver.cancel()
+    jwks_refresher.cancel()
+
+    await manager.drain()
+    print("🔻 WebSocket connections drained")
+
+    await services.aclose()
+    print("❌ MongoDB and Postgres disconnected")
 
 app = FastAPI(title="Auth API", lifespan=lifespan)
 
@@ -33,7 +94,6 @@ app.include_router(websocket_route, prefix="/ws", tags=["websocket"])
 app.include_router(message_route, prefix="/msg", tags=["Message"], dependencies=[Depends(verify_and_decode_access_token)])
 
 
-import uvicorn
-
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("app.main:app", reload=True)
\ No newline at end of file
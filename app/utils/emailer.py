@@ -1,16 +1,35 @@
-import boto3
 from app.core.config import settings
+from app.core.services import services
+
+
+def create_ses_client():
+    # boto3 is slow to import and to build a client with, so only pay for it on the first email
+    import boto3
+    return boto3.client("ses", region_name="ap-south-1", aws_access_key_id=settings.AWS_ACCESS_KEY, aws_secret_access_key=settings.AWS_SECRET_KEY)
+
+
+services.register("ses", create_ses_client)
 
-ses_client = boto3.client("ses", region_name="ap-south-1", aws_access_key_id=settings.AWS_ACCESS_KEY, aws_secret_access_key=settings.AWS_SECRET_KEY)
 
 def send_email(to_address: str, subject: str, body: str, is_html: bool = False):
+    from botocore.exceptions import ClientError
+
     message_body = {"Html": {"Data": body, "Charset": "UTF-8"}} if is_html else {"Text": {"Data": body, "Charset": "UTF-8"}}
 
-    ses_client.send_email(
-        Source=settings.ADMIN_EMAIL,  # Must be verified in SES
-        Destination={"ToAddresses": [to_address]},
-        Message={
-            "Subject": {"Data": subject, "Charset": "UTF-8"},
-            "Body": message_body
-        }
-    )
\ No newline at end of file
+    try:
+        services.get("ses").send_email(
+            Source=settings.ADMIN_EMAIL,  # Must be verified in SES
+            Destination={"ToAddresses": [to_address]},
+            Message={
+                "Subject": {"Data": subject, "Charset": "UTF-8"},
+                "Body": message_body
+            }
+        )
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        error_message = e.response["Error"]["Message"]
+
+        if error_code == "MessageRejected":
+            print("❌ Email rejected:", error_message)
+        else:
+            print("❌ Unexpected error:", error_message)
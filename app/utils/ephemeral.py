@@ -0,0 +1,78 @@
+# app/utils/ephemeral.py
+import asyncio
+import time
+from app.core.config import settings
+
+# Event types relayed to the receiver without ever touching Mongo. read_marker only
+# moves the other side's read indicator; unread counters are still cleared by
+# POST /msg/mark_read/{contact_user_id}
+EPHEMERAL_EVENT_TYPES = {"typing", "stop_typing", "read_marker"}
+
+# Events that describe the same UI state share a coalescing key, so the latest one wins
+COALESCE_KEYS = {"typing": "typing", "stop_typing": "typing", "read_marker": "read_marker"}
+
+# Events that clear a UI state are never rate limited, or an indicator could get stuck
+STATE_CLEARING_EVENT_TYPES = {"stop_typing"}
+
+
+class EphemeralCoalescer:
+    """Coalesces ephemeral events per (sender, receiver, coalesce key) over a short window.
+
+    Only the latest event of a burst is sent once the window closes, and each
+    sender is capped at max_per_second submitted events; the rest are dropped
+    unless they clear a state (stop_typing).
+    """
+
+    def __init__(self, send, window_seconds: float | None = None, max_per_second: int | None = None):
+        self._send = send  # async (receiver_id, event) -> None
+        self._window_seconds = window_seconds
+        self._max_per_second = max_per_second
+        self._pending = {}  # (sender_id, receiver_id, coalesce key) -> latest event
+        self._rate = {}  # sender_id -> (second, count)
+        self._tasks = set()
+
+    @property
+    def window_seconds(self) -> float:
+        return self._window_seconds or settings.EPHEMERAL_COALESCE_WINDOW_SECONDS
+
+    @property
+    def max_per_second(self) -> int:
+        return self._max_per_second or settings.EPHEMERAL_MAX_EVENTS_PER_SECOND
+
+    def submit(self, sender_id: str, receiver_id: str, event: dict) -> bool:
+        if event["type"] not in STATE_CLEARING_EVENT_TYPES and not self._allow(sender_id):
+            return False
+
+        key = (sender_id, receiver_id, COALESCE_KEYS.get(event["type"], event["type"]))
+        is_new = key not in self._pending
+        self._pending[key] = event
+
+        if is_new:
+            task = asyncio.create_task(self._flush_later(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+
+    def forget(self, sender_id: str):
+        """Drop rate state for a sender that disconnected."""
+        self._rate.pop(sender_id, None)
+
+    def _allow(self, sender_id: str) -> bool:
+        second = int(time.monotonic())
+        window, count = self._rate.get(sender_id, (second, 0))
+        if window != second:
+            window, count = second, 0
+        if count >= self.max_per_second:
+            return False
+        self._rate[sender_id] = (window, count + 1)
+        return True
+
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.window_seconds)
+        event = self._pending.pop(key, None)
+        if event is None:
+            return
+        try:
+            await self._send(key[1], event)
+        except Exception as e:
+            print("Ephemeral event not delivered to", key[1], ":", repr(e))
@@ -0,0 +1,51 @@
+# app/utils/fake_idp.py
+import time
+import uuid
+import jwt
+from app.core.oauth import OAuthProvider, register_provider
+
+# Local stand-in for an OIDC provider, for tests and local development. It signs
+# ID tokens with its own RSA key and preloads its JWKS into the provider cache,
+# so the oauth login path runs end to end without any network access:
+#
+#     idp = FakeIdentityProvider()
+#     idp.install()
+#     client.post("/auth/oauth/fake/login", json={"id_token": idp.issue_id_token("sub-1", "a@b.com")})
+
+
+class FakeIdentityProvider:
+    def __init__(self, name: str = "fake", issuer: str = "https://idp.test", client_id: str = "talkie-test"):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        self.name = name
+        self.issuer = issuer
+        self.client_id = client_id
+        self.kid = uuid.uuid4().hex
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def jwks(self) -> dict:
+        public_jwk = jwt.algorithms.RSAAlgorithm.to_jwk(self._private_key.public_key(), as_dict=True)
+        return {"keys": [{**public_jwk, "kid": self.kid, "alg": "RS256", "use": "sig"}]}
+
+    def install(self) -> OAuthProvider:
+        provider = OAuthProvider(self.name, issuers=[self.issuer], jwks_uri=None, client_id=self.client_id)
+        provider.load_jwks(self.jwks())
+        register_provider(provider)
+        return provider
+
+    def issue_id_token(self, sub: str, email: str, email_verified: bool = True, name: str | None = None,
+                       expires_in_seconds: int = 300, **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": self.issuer,
+            "aud": self.client_id,
+            "sub": sub,
+            "email": email,
+            "email_verified": email_verified,
+            "iat": now,
+            "exp": now + expires_in_seconds,
+            **claims,
+        }
+        if name:
+            payload["name"] = name
+        return jwt.encode(payload, self._private_key, algorithm="RS256", headers={"kid": self.kid})
@@ -0,0 +1,28 @@
+# scripts/backfill_conversations.py
+"""One-off backfill of the conversations collection from existing messages.
+
+Safe to re-run: summaries that already exist are left untouched.
+
+    python scripts/backfill_conversations.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.services import services
+from app.db.conversations import backfill_conversations
+from app.db.mongo import get_mongo_db
+
+
+async def main():
+    try:
+        await backfill_conversations(get_mongo_db())
+        print("✅ Conversations backfilled")
+    finally:
+        await services.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+# scripts/check_import_time.py
+"""Check that importing the app stays within the cold-start budget.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter a few
+times, takes the fastest cumulative time for `app.main`, and fails if it is over
+budget or if any client SDK got imported eagerly.
+
+    python scripts/check_import_time.py --budget-ms 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only built lazily through app.core.services, never on import
+LAZY_MODULES = ("boto3", "botocore", "motor", "pymongo", "bson", "psycopg", "psycopg_pool", "uvicorn")
+
+PROBE = (
+    "import sys, app.main; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure() -> tuple[float, list[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "app.main":
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError("app.main not found in -X importtime output")
+
+    eager = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, eager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", 1000)))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best_ms = min(ms for ms, _ in runs)
+    eager = runs[0][1]
+
+    print(f"import app.main: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    if eager:
+        print(f"❌ imported eagerly: {', '.join(eager)}")
+    if best_ms > args.budget_ms:
+        print("❌ over import-time budget")
+
+    return 1 if eager or best_ms > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
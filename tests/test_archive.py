@@ -0,0 +1,82 @@
+# tests/test_archive.py
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from app.db.archive import (
+    acquire_lease, archive_batch, bucket_id, compress_messages,
+    decompress_messages, find_archived_messages,
+)
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_message(sender, receiver, minutes_ago, **extra):
+    return {
+        "_id": ObjectId(),
+        "sender_id": sender,
+        "receiver_id": receiver,
+        "message": f"hi {minutes_ago}",
+        "timestamp": NOW - timedelta(minutes=minutes_ago),
+        "status": "sent",
+        **extra,
+    }
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["talkie_test"]
+
+
+def test_compress_round_trip_keeps_every_field():
+    msgs = [
+        make_message("a", "b", 2),
+        make_message("b", "a", 1, status="read", read_at=NOW),
+    ]
+
+    restored = decompress_messages(compress_messages(msgs))
+
+    assert restored == [{k: v for k, v in msg.items() if k != "_id"} for msg in msgs]
+
+
+def test_bucket_id_depends_on_the_exact_message_set():
+    a, b, c = (make_message("a", "b", i) for i in range(3))
+
+    assert bucket_id([a, b]) == bucket_id([b, a])
+    assert bucket_id([a, b]) != bucket_id([a, b, c])
+
+
+async def test_archive_batch_moves_old_messages(db):
+    old = [make_message("a", "b", 60 * 24 * 100 + i) for i in range(3)]
+    recent = make_message("a", "b", 5)
+    await db.messages.insert_many(old + [recent])
+
+    moved = await archive_batch(db, NOW - timedelta(days=90), batch_size=10)
+
+    assert moved == 3
+    assert [m["_id"] async for m in db.messages.find()] == [recent["_id"]]
+    archived = await find_archived_messages(db, "b", "a", NOW, limit=10)
+    assert [m["message"] for m in archived] == [m["message"] for m in old]
+
+
+async def test_rerun_with_more_messages_loses_nothing(db):
+    first = [make_message("a", "b", 60 * 24 * 100 + i) for i in range(2)]
+    await db.messages.insert_many(first)
+    await archive_batch(db, NOW - timedelta(days=90), batch_size=10)
+
+    # A crash after archiving: the first batch is back in `messages` alongside a newer one
+    later = make_message("b", "a", 60 * 24 * 95)
+    await db.messages.insert_many(first + [later])
+
+    moved = await archive_batch(db, NOW - timedelta(days=90), batch_size=10)
+
+    assert moved == 3
+    assert await db.messages.count_documents({}) == 0
+    archived = await find_archived_messages(db, "a", "b", NOW, limit=10)
+    assert sorted(m["message"] for m in archived) == sorted(m["message"] for m in first + [later])
+
+
+async def test_lease_is_held_by_one_owner(db):
+    assert await acquire_lease(db, "worker-1", seconds=60)
+    assert not await acquire_lease(db, "worker-2", seconds=60)
+    assert await acquire_lease(db, "worker-1", seconds=60)
@@ -0,0 +1,87 @@
+# tests/test_conversations.py
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from app.core.security import create_access_token
+from app.core.services import services
+from app.db.conversations import mark_conversation_read, record_message
+from app.main import app
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def message(sender, receiver, at=NOW, text="hi"):
+    return {"sender_id": sender, "receiver_id": receiver, "message": text, "timestamp": at, "status": "sent"}
+
+
+async def send(db, msg):
+    await db.messages.insert_one(msg)
+    await record_message(db, msg)
+
+
+async def summary(db, user_id, contact_user_id):
+    return await db.conversations.find_one({"user_id": user_id, "contact_user_id": contact_user_id})
+
+
+@pytest.fixture
+def mongo():
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def db(mongo):
+    return mongo["talkie_test"]
+
+
+async def test_record_message_counts_unread_for_the_receiver_only(db):
+    await send(db, message("alice", "bob", NOW, "one"))
+    await send(db, message("alice", "bob", NOW + timedelta(seconds=1), "two"))
+
+    sender = await summary(db, "alice", "bob")
+    receiver = await summary(db, "bob", "alice")
+
+    assert sender["unread_count"] == 0
+    assert receiver["unread_count"] == 2
+    for doc in (sender, receiver):
+        assert (doc["last_message"], doc["last_sender_id"]) == ("two", "alice")
+        assert doc["last_message_at"] == NOW + timedelta(seconds=1)
+
+
+async def test_mark_read_resets_the_readers_counter(db):
+    await send(db, message("alice", "bob"))
+    await send(db, message("bob", "alice"))
+
+    await mark_conversation_read(db, "bob", "alice")
+
+    assert (await summary(db, "bob", "alice"))["unread_count"] == 0
+    assert (await summary(db, "alice", "bob"))["unread_count"] == 1
+    statuses = {m["sender_id"]: m["status"] async for m in db.messages.find()}
+    assert statuses == {"alice": "read", "bob": "sent"}
+
+
+def test_conversations_endpoint_orders_and_pages_without_gaps(mongo, db):
+    # c1 and c2 share a millisecond, so a page boundary between them must not drop one
+    sends = [("c0", NOW), ("c1", NOW + timedelta(minutes=1)), ("c2", NOW + timedelta(minutes=1)),
+             ("c3", NOW + timedelta(minutes=2))]
+    for contact, at in sends:
+        asyncio.run(send(db, message(contact, "me", at)))
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token('me')}"}
+    seen, params = [], {"limit": 2}
+    with services.override("mongo", mongo):
+        while True:
+            page = client.get("/msg/conversations", params=params, headers=headers).json()
+            seen += [c["contact_user_id"] for c in page["conversations"]]
+            if page["next_before"] is None:
+                break
+            params = {"limit": 2, "before": page["next_before"],
+                      "before_contact_user_id": page["next_before_contact_user_id"]}
+
+        assert seen == ["c3", "c2", "c1", "c0"]
+
+        client.post("/msg/mark_read/c3", headers=headers)
+        first = client.get("/msg/conversations", params={"limit": 1}, headers=headers).json()
+        assert first["conversations"][0]["unread_count"] == 0
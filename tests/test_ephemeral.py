@@ -0,0 +1,55 @@
+# tests/test_ephemeral.py
+import asyncio
+import pytest
+from app.utils.ephemeral import EphemeralCoalescer
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def coalescer(sent):
+    async def send(receiver_id, event):
+        sent.append((receiver_id, event["type"], event.get("data")))
+
+    return EphemeralCoalescer(send, window_seconds=0.02, max_per_second=5)
+
+
+async def flush():
+    await asyncio.sleep(0.05)
+
+
+async def test_burst_is_coalesced_to_latest_event(coalescer, sent):
+    for i in range(4):
+        coalescer.submit("alice", "bob", {"type": "read_marker", "data": i})
+    await flush()
+
+    assert sent == [("bob", "read_marker", 3)]
+
+
+async def test_typing_states_share_one_key_and_latest_wins(coalescer, sent):
+    for event_type in ("typing", "stop_typing", "typing"):
+        coalescer.submit("alice", "bob", {"type": event_type})
+    await flush()
+
+    assert [event_type for _, event_type, _ in sent] == ["typing"]
+
+
+async def test_events_for_different_receivers_are_kept_apart(coalescer, sent):
+    coalescer.submit("alice", "bob", {"type": "typing"})
+    coalescer.submit("alice", "carol", {"type": "typing"})
+    await flush()
+
+    assert sorted(receiver for receiver, _, _ in sent) == ["bob", "carol"]
+
+
+async def test_rate_cap_drops_events_but_never_stop_typing(coalescer, sent):
+    accepted = [coalescer.submit("alice", "bob", {"type": "read_marker", "data": i}) for i in range(7)]
+
+    assert accepted == [True] * 5 + [False] * 2
+    assert coalescer.submit("alice", "bob", {"type": "stop_typing"})
+
+    await flush()
+    assert ("bob", "stop_typing", None) in sent
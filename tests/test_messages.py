@@ -0,0 +1,78 @@
+# tests/test_messages.py
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from app.core.security import create_access_token
+from app.core.services import services
+from app.db.archive import archive_batch
+from app.main import app
+
+
+def test_get_messages_pages_into_archive_with_timezone_aware_before():
+    mongo = AsyncMongoMockClient()
+    db = mongo["talkie_test"]
+    sent_at = datetime(2025, 1, 1, 9, 0, 0)
+
+    asyncio.run(db.messages.insert_one({
+        "_id": ObjectId(), "sender_id": "alice", "receiver_id": "bob",
+        "message": "archived", "timestamp": sent_at, "status": "sent",
+    }))
+    asyncio.run(archive_batch(db, sent_at + timedelta(days=1), batch_size=10))
+
+    # No `with`: the lifespan (real Mongo/Postgres) is not started
+    client = TestClient(app)
+    with services.override("mongo", mongo):
+        response = client.get(
+            "/msg/get_messages/bob",
+            params={"before": "2025-06-01T00:00:00Z"},
+            headers={"Authorization": f"Bearer {create_access_token('alice')}"},
+        )
+
+    assert response.status_code == 200
+    assert [m["message"] for m in response.json()] == ["archived"]
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch):
+    # UTC+5:30, like the ap-south-1 deployment; naive local time would be off by 5.5 hours
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_timestamps_are_utc_on_a_non_utc_host(non_utc_host):
+    mongo = AsyncMongoMockClient()
+    db = mongo["talkie_test"]
+    client = TestClient(app)
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    with services.override("mongo", mongo):
+        with client.websocket_connect(f"/ws/connect?token={create_access_token('alice')}") as ws:
+            ws.send_json({"receiver_id": "bob", "message": "first"})
+            ws.send_json({"receiver_id": "bob", "message": "gone soon", "ttl_seconds": 60})
+            # Bad TTLs get an error frame and leave the socket open
+            ws.send_json({"receiver_id": "bob", "message": "bad", "ttl_seconds": "abc"})
+            assert ws.receive_json() == {"type": "error", "detail": "ttl_seconds must be a positive integer"}
+            ws.send_json({"receiver_id": "bob", "message": "after"})
+
+        stored = {m["message"]: m for m in asyncio.run(db.messages.find().to_list(length=None))}
+        assert set(stored) == {"first", "gone soon", "after"}
+        assert abs(stored["first"]["timestamp"] - utc_now) < timedelta(minutes=1)
+        ephemeral = stored["gone soon"]
+        assert ephemeral["expires_at"] - ephemeral["timestamp"] == timedelta(seconds=60)
+
+        # A `Z` cursor at the second message's instant pages back to the first one only
+        before = ephemeral["timestamp"].replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+        response = client.get(
+            "/msg/get_messages/bob",
+            params={"before": before},
+            headers={"Authorization": f"Bearer {create_access_token('alice')}"},
+        )
+
+    assert [m["message"] for m in response.json()] == ["first"]
@@ -0,0 +1,218 @@
+# tests/test_oauth.py
+import asyncio
+import json
+import time
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from app.api.routes.auth import OAUTH_UPSERT_Q
+from app.core.config import get_settings, settings
+from app.core.oauth import OAuthProvider, providers, register_provider, run_jwks_refresher
+from app.core.services import services
+from app.main import app, report_task_exit
+from app.utils.fake_idp import FakeIdentityProvider
+
+
+@pytest.fixture
+def idp():
+    idp = FakeIdentityProvider()
+    idp.install()
+    yield idp
+    providers.pop(idp.name, None)
+
+
+@pytest.fixture
+def client(pg_dsn, pg_conn):
+    # Opened by the lifespan inside the TestClient's event loop
+    pool = AsyncConnectionPool(pg_dsn, kwargs={"row_factory": dict_row}, open=False)
+
+    with services.override("postgres", pool), services.override("mongo", AsyncMongoMockClient()):
+        with TestClient(app) as client:
+            yield client
+            client.portal.call(pool.close)
+
+
+def login(client, id_token):
+    return client.post("/auth/oauth/fake/login", json={"id_token": id_token})
+
+
+def user_id_of(response) -> str:
+    return jwt.decode(response.json()["access_token"], settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])["sub"]
+
+
+def test_new_user_is_created_and_linked(client, pg_conn, idp):
+    response = login(client, idp.issue_id_token("fake-1", "new@talkie.test", name="New User"))
+
+    assert response.status_code == 200
+    assert set(response.json()) >= {"access_token", "id_token", "refresh_token"}
+
+    user = pg_conn.execute("SELECT id, email, full_name, email_verified FROM users").fetchone()
+    assert (user["email"], user["full_name"], user["email_verified"]) == ("new@talkie.test", "New User", True)
+    assert str(user["id"]) == user_id_of(response)
+
+    account = pg_conn.execute("SELECT user_id, provider, provider_user_id FROM oauth_accounts").fetchone()
+    assert (account["user_id"], account["provider"], account["provider_user_id"]) == (user["id"], "fake", "fake-1")
+    assert pg_conn.execute("SELECT count(*) AS n FROM refresh_tokens").fetchone()["n"] == 1
+
+
+def test_linked_account_logs_into_the_same_user(client, pg_conn, idp):
+    first = login(client, idp.issue_id_token("fake-1", "old@talkie.test"))
+    # The provider email changed; the link by provider_user_id still wins
+    second = login(client, idp.issue_id_token("fake-1", "renamed@talkie.test"))
+
+    assert first.status_code == second.status_code == 200
+    assert user_id_of(first) == user_id_of(second)
+    assert pg_conn.execute("SELECT count(*) AS n FROM users").fetchone()["n"] == 1
+    assert pg_conn.execute("SELECT provider_email FROM oauth_accounts").fetchone()["provider_email"] == "renamed@talkie.test"
+
+
+def test_unverified_email_is_rejected(client, pg_conn, idp):
+    response = login(client, idp.issue_id_token("fake-1", "new@talkie.test", email_verified=False))
+
+    assert response.status_code == 401
+    assert pg_conn.execute("SELECT count(*) AS n FROM users").fetchone()["n"] == 0
+
+
+def test_wrong_audience_is_rejected(client, idp):
+    response = login(client, idp.issue_id_token("fake-1", "new@talkie.test", aud="someone-else"))
+
+    assert response.status_code == 401
+
+
+def test_unknown_signing_key_is_rejected(client, idp):
+    # Same issuer and audience, but a key the installed provider has never seen
+    impostor = FakeIdentityProvider(issuer=idp.issuer, client_id=idp.client_id)
+
+    response = login(client, impostor.issue_id_token("fake-1", "new@talkie.test"))
+
+    assert response.status_code == 401
+
+
+def test_header_algorithm_not_matching_the_key_is_rejected(client, idp):
+    token = jwt.encode(
+        {"iss": idp.issuer, "aud": idp.client_id, "sub": "fake-1", "email": "new@talkie.test",
+         "email_verified": True, "iat": 0, "exp": 2 ** 31},
+        ec.generate_private_key(ec.SECP256R1()),
+        algorithm="ES256",
+        headers={"kid": idp.kid},
+    )
+
+    response = login(client, token)
+
+    assert response.status_code == 401
+
+
+def upsert(conn, sub, email, name=None):
+    return conn.execute(OAUTH_UPSERT_Q, {
+        "provider": "fake", "sub": sub, "email": email, "name": name, "extra": json.dumps({}),
+    }).fetchone()
+
+
+def test_upsert_links_existing_password_user_by_email(pg_conn):
+    existing = pg_conn.execute(
+        "INSERT INTO users (email, full_name, password_hash) VALUES (%s, %s, %s) RETURNING id",
+        ("pw@talkie.test", "Password User", "hash"),
+    ).fetchone()
+
+    row = upsert(pg_conn, "fake-1", "pw@talkie.test", name="Provider Name")
+
+    assert row["id"] == existing["id"]
+    assert row["full_name"] == "Password User"
+    user = pg_conn.execute("SELECT email_verified, password_hash FROM users").fetchone()
+    assert (user["email_verified"], user["password_hash"]) == (True, "hash")
+    assert pg_conn.execute("SELECT user_id FROM oauth_accounts").fetchone()["user_id"] == existing["id"]
+
+
+def test_upsert_is_idempotent(pg_conn):
+    first = upsert(pg_conn, "fake-1", "a@talkie.test")
+    second = upsert(pg_conn, "fake-1", "a@talkie.test")
+
+    assert first["id"] == second["id"]
+    assert pg_conn.execute("SELECT count(*) AS n FROM oauth_accounts").fetchone()["n"] == 1
+
+
+class FlakyJWKSProvider(OAuthProvider):
+    """Remote provider whose first JWKS fetch fails, like a network blip at pod start."""
+
+    def __init__(self, idp):
+        super().__init__("flaky", issuers=[idp.issuer], jwks_uri="https://idp.test/jwks", client_id=idp.client_id)
+        self.idp = idp
+        self.fetches = 0
+
+    async def refresh_keys(self, client):
+        self.fetches += 1
+        if self.fetches == 1:
+            raise ConnectionError("network blip")
+        self.load_jwks(self.idp.jwks())
+
+
+async def refresh_until_loaded(provider):
+    task = asyncio.create_task(run_jwks_refresher())
+    try:
+        for _ in range(100):
+            if provider.keys:
+                return
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+
+def test_refresher_retries_failed_fetch_quickly_on_every_loop(monkeypatch):
+    monkeypatch.setattr(get_settings(), "OAUTH_JWKS_RETRY_MIN_SECONDS", 0.01)
+    idp = FakeIdentityProvider()
+
+    # Two separate loops, like consecutive TestClient lifespans
+    for _ in range(2):
+        provider = FlakyJWKSProvider(idp)
+        register_provider(provider)
+        try:
+            asyncio.run(refresh_until_loaded(provider))
+        finally:
+            providers.pop(provider.name, None)
+
+        assert provider.fetches == 2
+        assert provider.keys
+
+
+def test_provider_without_keys_wakes_the_refresher(monkeypatch, idp):
+    requested = []
+    monkeypatch.setattr("app.api.routes.auth.request_jwks_refresh", lambda: requested.append(True))
+    register_provider(OAuthProvider("empty", issuers=[idp.issuer], jwks_uri="https://idp.test/jwks",
+                                    client_id=idp.client_id))
+    try:
+        response = TestClient(app).post("/auth/oauth/empty/login", json={"id_token": "x"})
+    finally:
+        providers.pop("empty", None)
+
+    assert response.status_code == 503
+    assert requested == [True]
+
+
+def test_verify_tolerates_provider_clock_skew(idp):
+    provider = providers[idp.name]
+    ahead = int(time.time()) + 30
+
+    claims = provider.verify(idp.issue_id_token("fake-1", "a@talkie.test", iat=ahead))
+    assert claims["sub"] == "fake-1"
+
+    with pytest.raises(jwt.ImmatureSignatureError):
+        provider.verify(idp.issue_id_token("fake-1", "a@talkie.test", iat=ahead + 600))
+
+
+def test_dead_background_task_is_reported(capsys):
+    async def crash():
+        raise RuntimeError("boom")
+
+    async def run():
+        task = asyncio.create_task(crash())
+        task.add_done_callback(report_task_exit("crasher"))
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert "Background task crasher died" in capsys.readouterr().out
@@ -0,0 +1,56 @@
+# tests/test_websocket.py
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from starlette.websockets import WebSocketDisconnect
+from app.api.routes.websocket_connection import (
+    WS_CLOSE_SERVICE_RESTART, WS_CLOSE_TRY_AGAIN_LATER, manager,
+)
+from app.core.security import create_access_token
+from app.core.services import services
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    # No lifespan here, so undo any drain an earlier lifespan shutdown left behind
+    manager.reset()
+    with services.override("mongo", AsyncMongoMockClient()):
+        yield TestClient(app)
+    manager.reset()
+    manager.active_connections.clear()
+
+
+def connect(client, user_id):
+    return client.websocket_connect(f"/ws/connect?token={create_access_token(user_id)}")
+
+
+def test_drain_sends_reconnect_and_refuses_new_sockets(client):
+    with connect(client, "alice") as ws:
+        ws.portal.call(manager.drain)
+
+        frame = ws.receive_json()
+        assert frame["type"] == "reconnect"
+        assert 0 <= frame["delay_ms"]
+        assert ws.receive()["code"] == WS_CLOSE_SERVICE_RESTART
+
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with connect(client, "bob"):
+            pass
+    assert refused.value.code == WS_CLOSE_TRY_AGAIN_LATER
+
+    # A lifespan restart accepts sockets again
+    manager.reset()
+    with connect(client, "bob"):
+        assert "bob" in manager.active_connections
+
+
+def test_per_worker_cap_refuses_extra_sockets(client, monkeypatch):
+    monkeypatch.setattr(manager, "_max_connections", 1)
+
+    with connect(client, "alice"):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with connect(client, "bob"):
+                pass
+
+    assert refused.value.code == WS_CLOSE_TRY_AGAIN_LATER